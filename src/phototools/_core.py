@@ -0,0 +1,182 @@
+# Shared image pipeline for the phototools CLIs: loading with EXIF orientation,
+# shrinking, saving without EXIF data, and running a batch of images in
+# parallel. Image libraries are selected through BACKENDS.
+
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+DEFAULT_BACKEND = "pillow"  # Default image library (pillow, vips)
+UNBOUNDED_PIXELS = 10**7  # Bounding box size of a dimension that is not limited
+CHUNKSIZE = 4  # Number of images handed to a worker process at a time
+PREFETCH_DEPTH = 8  # Number of images read ahead of those being processed
+EXIF_ORIENTATION_TAG = 0x0112
+WINDOWS_MAX_WORKERS = 61  # ProcessPoolExecutor limit on Windows
+
+
+def load_image(
+    source_path,  # Path to the source image
+    target_width,  # Width the image will be shrunk to fit
+    target_height,  # Height the image will be shrunk to fit
+    draft_margin=1,  # Factor the reduced decode size is kept above the target
+):
+    # Opens an image and bakes in its EXIF orientation. Returns the image and
+    # the original size in the rotated orientation
+    with Image.open(source_path) as img:
+        # Read from the header, pixels are not decoded yet
+        width, height = img.size
+
+        # Orientations 5 to 8 rotate the image by 90 degrees, so the target
+        # box is rotated to match the image before orientation is applied
+        rotated = img.getexif().get(EXIF_ORIENTATION_TAG, 1) in (5, 6, 7, 8)
+        if rotated:
+            target_width, target_height = target_height, target_width
+
+        scale = min(target_width / width, target_height / height) * draft_margin
+        if scale < 1:
+            # Let libjpeg decode at a reduced 1/2, 1/4 or 1/8 scale that is
+            # still at least the draft size, so Lanczos only has to work on
+            # the reduced image
+            img.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+
+        # Bakes image orientation into image by rotating to match EXIF orientation,
+        # ImageOps.exif_transpose handles all EXIF orientation cases. It returns
+        # a new image, so the file can be closed afterwards
+        img = ImageOps.exif_transpose(img)
+
+        if img is None:
+            raise ValueError("Could not process orientation")
+
+    if rotated:
+        width, height = height, width
+
+    return img, (width, height)
+
+
+def save_image(img, output_path, quality, optimize):
+    # Save with reduced quality, removing EXIF data (orientation already applied)
+    img.save(output_path, quality=quality, optimize=optimize, exif=b"")
+
+
+def process_image(
+    source_path,  # Path to the source image
+    output_path,  # Path to save the processed image
+    target_width,  # Max output width in pixels
+    target_height,  # Max output height in pixels
+    quality,  # Output JPG quality percentage
+    optimize,  # Optimize Huffman tables, slower but slightly smaller files
+    draft_margin=1,  # Factor the reduced decode size is kept above the target
+):
+    # Shrinks an image to fit within target_width x target_height, keeping its
+    # aspect ratio. Images that already fit are not resized. Returns the
+    # original and output sizes
+    img, original_size = load_image(
+        source_path, target_width, target_height, draft_margin
+    )
+    img.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
+    save_image(img, output_path, quality, optimize)
+    return original_size, img.size
+
+
+def process_image_vips(
+    source_path,  # Path to the source image
+    output_path,  # Path to save the processed image
+    target_width,  # Max output width in pixels
+    target_height,  # Max output height in pixels
+    quality,  # Output JPG quality percentage
+    optimize,  # Optimize Huffman tables, slower but slightly smaller files
+    draft_margin=1,  # Unused, libvips picks its own shrink-on-load factor
+):
+    # Same as process_image, using libvips. Decoding, EXIF rotation, shrinking
+    # and encoding run as one streaming pipeline, so the full size image is
+    # never held in memory
+    import pyvips
+
+    # Only reads the header, autorot() swaps width and height if needed
+    source = pyvips.Image.new_from_file(str(source_path)).autorot()
+
+    # thumbnail() applies the EXIF orientation and uses JPEG shrink-on-load
+    img = pyvips.Image.thumbnail(
+        str(source_path), target_width, height=target_height, size="down"
+    )
+
+    # Save with reduced quality, removing EXIF data (orientation already applied)
+    img.jpegsave(str(output_path), Q=quality, strip=True, optimize_coding=optimize)
+    return (source.width, source.height), (img.width, img.height)
+
+
+BACKENDS = {
+    "pillow": process_image,
+    "vips": process_image_vips,
+}
+
+
+def check_backend(backend):
+    # Returns an error message if the backend's image library can't be loaded
+    if backend == "vips":
+        try:
+            import pyvips  # noqa: F401
+        except (ImportError, OSError) as e:
+            return f"vips backend requires pyvips and libvips: {e}"
+    return None
+
+
+def find_images(source_dir):
+    # Single directory pass, matching extensions case-insensitively
+    with os.scandir(source_dir) as entries:
+        return [
+            Path(entry.path)
+            for entry in entries
+            if entry.is_file() and entry.name.lower().endswith((".jpg", ".jpeg"))
+        ]
+
+
+def _prefetch(path):
+    # Asks the kernel to read the file into the page cache in the background,
+    # so disk reads overlap with decoding instead of stalling the workers.
+    # posix_fadvise is not available on Windows or macOS
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def _run_task(task):
+    # Unpacks a (function, *args) task tuple for ProcessPoolExecutor.map
+    function, *args = task
+    return function(*args)
+
+
+def run_in_parallel(tasks):
+    # Runs (function, source_path, *args) tasks in a process pool, one task per
+    # image. Each function returns a status message instead of printing it, so
+    # messages are printed in order by the main process
+    workers = os.cpu_count() or 1
+    if sys.platform == "win32":
+        workers = min(workers, WINDOWS_MAX_WORKERS)
+
+    # Keep the images about to be picked up by the workers prefetched, a
+    # single image is read directly by its worker
+    read_ahead = workers * CHUNKSIZE + PREFETCH_DEPTH
+    if len(tasks) > 1:
+        for task in tasks[:read_ahead]:
+            _prefetch(task[1])
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_run_task, tasks, chunksize=CHUNKSIZE)
+        for i, message in enumerate(results):
+            if i + read_ahead < len(tasks):
+                _prefetch(tasks[i + read_ahead][1])
+
+            # One write per image, including the blank separator line
+            print(f"{message}\n")
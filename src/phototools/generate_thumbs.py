@@ -1,18 +1,24 @@
-#!/usr/bin/env python3
-#
 # This CLI utility processes all JPG files in a directory and generates
 # thumbnails of a configurable size and quality for web display.
 
 import argparse
 from pathlib import Path
 
-from PIL import Image
+from phototools._core import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    UNBOUNDED_PIXELS,
+    check_backend,
+    find_images,
+    run_in_parallel,
+)
 
 # Default configuration
 DEFAULT_TARGET_DIMENSION = "height"  # Default dim (height, width) for thumbnail scaling
 DEFAULT_TARGET_PIXELS = 200  # Default thumbnail dimension in pixels
 DEFAULT_QUALITY = 80  # Default thumbnail JPG quality percentage
 DEFAULT_OUTPUT_DIR = "thumbs"
+DRAFT_MARGIN = 2  # Keep the reduced JPG decode at least twice the thumbnail size
 
 
 def generate_thumbnail(
@@ -21,41 +27,32 @@ def generate_thumbnail(
     dim,  # Dimension (height, width) used for scaling
     size,  # Thumbnail size of the scaling dimension
     quality,  # Thumbnail JPG quality percentage
+    optimize=False,  # Optimize Huffman tables, slower but slightly smaller files
+    backend=DEFAULT_BACKEND,  # Image library (pillow, vips)
 ):
+    # Returns a status message instead of printing it, so output from worker
+    # processes is printed in order by the main process
     try:
-        with Image.open(source_path) as img:
-            # ImageOps.exif_transpose handles all EXIF orientation cases
-            from PIL import ImageOps
-
-            # Bakes image orientation into image by rotating to match EXIF orientation
-            img = ImageOps.exif_transpose(img)
-
-            if img is None:
-                print(f"✗ Error: Could not process orientation for {source_path.name}")
-                return
-
-            ### old code below here
-
-            # Calculate new width to maintain aspect ratio
-            aspect_ratio = img.width / img.height
-            if dim == "width":
-                thumb_width = size
-                thumb_height = int(thumb_width / aspect_ratio)
-            else:
-                thumb_height = size
-                thumb_width = int(thumb_height * aspect_ratio)
-
-            # Resize thumb
-            img_resized = img.resize(
-                (thumb_width, thumb_height), Image.Resampling.LANCZOS
-            )
-
-            # Save thumbnail with reduced quality, removing EXIF data (orientation already applied)
-            img_resized.save(output_path, quality=quality, optimize=True, exif=b"")
-            print(f"✓ Generated: {output_path.name}")
+        # Shrink to fit the scaling dimension, the other dimension is left
+        # unbounded and follows the aspect ratio
+        if dim == "width":
+            thumb_width, thumb_height = size, UNBOUNDED_PIXELS
+        else:
+            thumb_width, thumb_height = UNBOUNDED_PIXELS, size
+
+        BACKENDS[backend](
+            source_path,
+            output_path,
+            thumb_width,
+            thumb_height,
+            quality,
+            optimize,
+            DRAFT_MARGIN,
+        )
+        return f"✓ Generated: {output_path.name}"
 
     except Exception as e:
-        print(f"✗ Error processing {source_path.name}: {e}")
+        return f"✗ Error processing {source_path.name}: {e}"
 
 
 def main():
@@ -101,6 +98,20 @@ def main():
         help="Thumbnail JPG quality percentage",
     )
 
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Optimize JPG encoding for slightly smaller thumbnails, at the cost of slower encoding",
+    )
+
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=tuple(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help="Image processing library, vips requires the optional pyvips dependency",
+    )
+
     args = parser.parse_args()
 
     source_dir = Path(args.source_dir)
@@ -110,9 +121,12 @@ def main():
         print(f"Error: {source_dir} does not exist")
         return
 
-    image_files = []
-    for ext in ["*.jpg", "*.jpeg", "*.JPG", "*.JPEG"]:
-        image_files.extend(source_dir.glob(ext))
+    error = check_backend(args.backend)
+    if error:
+        print(f"Error: {error}")
+        return
+
+    image_files = find_images(source_dir)
 
     if not image_files:
         print(f"No JPG files found in {source_dir}")
@@ -122,22 +136,29 @@ def main():
     print("=== Process Parameters ===")
     print(f"{args.dimension}: {args.pixels}px")
     print(f"Quality: {args.quality}%")
+    print(f"Backend: {args.backend}")
     print("==========================")
     print(f"\nProcessing images from {source_dir} to {output_dir}...\n")
 
     # Create output directory if it doesn't exist
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Process each image
-    for source_path in sorted(image_files):
-        # Create output path
-        output_path = output_dir / source_path.name
-
-        # Resize and optimize
-        generate_thumbnail(
-            source_path, output_path, args.dimension, args.pixels, args.quality
+    tasks = [
+        (
+            generate_thumbnail,
+            source_path,
+            output_dir / source_path.name,
+            args.dimension,
+            args.pixels,
+            args.quality,
+            args.optimize,
+            args.backend,
         )
-        print()
+        for source_path in sorted(image_files)
+    ]
+
+    # Process images in parallel, one task per image
+    run_in_parallel(tasks)
 
     print(f"Done! Processed {len(image_files)} image(s)")
     print(f"Thumbnails saved to: {output_dir}")
@@ -0,0 +1,198 @@
+# This CLI utility processes all JPG files in a directory into both resized
+# images and thumbnails for web display, decoding each source image only once.
+
+import argparse
+from pathlib import Path
+
+from PIL import Image
+
+from phototools._core import (
+    UNBOUNDED_PIXELS,
+    find_images,
+    load_image,
+    run_in_parallel,
+    save_image,
+)
+
+# Default configuration
+DEFAULT_MAX_PIXELS = 3000  # Default max resized JPG dimension (longest edge) in pixels
+DEFAULT_QUALITY = 80  # Default resized JPG quality percentage
+DEFAULT_RESIZED_DIR = "resized"
+DEFAULT_THUMB_DIMENSION = "height"  # Default dim (height, width) for thumbnail scaling
+DEFAULT_THUMB_PIXELS = 200  # Default thumbnail dimension in pixels
+DEFAULT_THUMB_QUALITY = 80  # Default thumbnail JPG quality percentage
+DEFAULT_THUMBS_DIR = "thumbs"
+
+
+def process_image(
+    source_path,  # Path to the source image
+    resized_path,  # Path to save the resized image
+    thumb_path,  # Path to save the thumbnail
+    max_pixels,  # Max resized height or width in pixels
+    quality,  # Resized JPG quality percentage
+    thumb_dim,  # Dimension (height, width) used for scaling the thumbnail
+    thumb_size,  # Thumbnail size of the scaling dimension
+    thumb_quality,  # Thumbnail JPG quality percentage
+    optimize_thumb=False,  # Optimize thumbnail Huffman tables
+):
+    # Returns a status message instead of printing it, so output from worker
+    # processes is printed in order by the main process
+    try:
+        # Decoded once, at a reduced scale that still covers the resized size
+        img, (width, height) = load_image(source_path, max_pixels, max_pixels)
+
+        # Images already within max_pixels are not resized, but still re-saved
+        # with quality reduction
+        img.thumbnail((max_pixels, max_pixels), Image.Resampling.LANCZOS)
+        save_image(img, resized_path, quality, True)
+        resized_width, resized_height = img.size
+
+        # Scale the thumbnail from the resized image instead of the source,
+        # so Lanczos works on fewer pixels
+        if thumb_dim == "width":
+            bounding_box = (thumb_size, UNBOUNDED_PIXELS)
+        else:
+            bounding_box = (UNBOUNDED_PIXELS, thumb_size)
+        img.thumbnail(bounding_box, Image.Resampling.LANCZOS)
+        save_image(img, thumb_path, thumb_quality, optimize_thumb)
+
+        if max(width, height) > max_pixels:
+            resized = f"{width}x{height} → {resized_width}x{resized_height}"
+        else:
+            resized = f"{width}x{height} (no resize needed)"
+
+        return (
+            f"✓ Processed: {source_path.name}\n"
+            f"  Resized: {resized}\n"
+            f"  Thumbnail: {img.width}x{img.height}"
+        )
+
+    except Exception as e:
+        return f"✗ Error processing {source_path.name}: {e}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="process_all",
+        description="Generates both resized JPG images and JPG thumbnails in one pass, decoding each source image once. This is equivalent to running resize_images and generate_thumbs, except that the thumbnail is scaled from the resized image and images within the max dimension are always re-encoded. Images maintain the original image's aspect ratio and the utility attempts to apply the source image's EXIF rotation. Images already smaller than the max dimension will not be increased in size. If the images already exist in the destination folders with the same filename, the utility will overwrite them.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+
+    parser.add_argument(
+        "source_dir",
+        nargs="?",
+        default=".",
+        help="Source directory containing images",
+    )
+
+    parser.add_argument(
+        "--resized-dir",
+        default=DEFAULT_RESIZED_DIR,
+        help="Output directory for resized images, automatically created if it does not exist",
+    )
+
+    parser.add_argument(
+        "--thumbs-dir",
+        default=DEFAULT_THUMBS_DIR,
+        help="Output directory for thumbnails, automatically created if it does not exist",
+    )
+
+    parser.add_argument(
+        "--pixels",
+        type=int,
+        default=DEFAULT_MAX_PIXELS,
+        help="Resized max size of longest side in pixels",
+    )
+
+    parser.add_argument(
+        "--quality",
+        type=int,
+        default=DEFAULT_QUALITY,
+        help="Resized JPG quality percentage",
+    )
+
+    parser.add_argument(
+        "--thumb-dimension",
+        type=str,
+        choices=("width", "height"),
+        default=DEFAULT_THUMB_DIMENSION,
+        help="Dimension used for scaling thumbnail size",
+    )
+
+    parser.add_argument(
+        "--thumb-pixels",
+        type=int,
+        default=DEFAULT_THUMB_PIXELS,
+        help="Size to scale thumbnails, in pixels",
+    )
+
+    parser.add_argument(
+        "--thumb-quality",
+        type=int,
+        default=DEFAULT_THUMB_QUALITY,
+        help="Thumbnail JPG quality percentage",
+    )
+
+    parser.add_argument(
+        "--optimize-thumbs",
+        action="store_true",
+        help="Optimize JPG encoding for slightly smaller thumbnails, at the cost of slower encoding",
+    )
+
+    args = parser.parse_args()
+
+    source_dir = Path(args.source_dir)
+    resized_dir = Path(args.resized_dir)
+    thumbs_dir = Path(args.thumbs_dir)
+
+    if not source_dir.exists():
+        print(f"Error: {source_dir} does not exist")
+        return
+
+    image_files = find_images(source_dir)
+
+    if not image_files:
+        print(f"No JPG files found in {source_dir}")
+        return
+
+    print(f"Found {len(image_files)} image(s) to process")
+    print("=== Process Parameters ===")
+    print(f"Max height or width: {args.pixels}px")
+    print(f"Quality: {args.quality}%")
+    print(f"Thumbnail {args.thumb_dimension}: {args.thumb_pixels}px")
+    print(f"Thumbnail quality: {args.thumb_quality}%")
+    print("==========================")
+    print(
+        f"\nProcessing images from {source_dir} to {resized_dir} and {thumbs_dir}...\n"
+    )
+
+    # Create output directories if they don't exist
+    resized_dir.mkdir(parents=True, exist_ok=True)
+    thumbs_dir.mkdir(parents=True, exist_ok=True)
+
+    tasks = [
+        (
+            process_image,
+            source_path,
+            resized_dir / source_path.name,
+            thumbs_dir / source_path.name,
+            args.pixels,
+            args.quality,
+            args.thumb_dimension,
+            args.thumb_pixels,
+            args.thumb_quality,
+            args.optimize_thumbs,
+        )
+        for source_path in sorted(image_files)
+    ]
+
+    # Process images in parallel, one task per image
+    run_in_parallel(tasks)
+
+    print(f"Done! Processed {len(image_files)} image(s)")
+    print(f"Resized images saved to: {resized_dir}")
+    print(f"Thumbnails saved to: {thumbs_dir}")
+
+
+if __name__ == "__main__":
+    main()
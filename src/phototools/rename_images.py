@@ -16,7 +16,11 @@ Usage:
         rename_images
 """
 
+import os
+import re
 import secrets
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
@@ -25,40 +29,186 @@ from PIL.ExifTags import TAGS
 
 # Configuration
 SOURCE_DIR = Path.cwd()
+EXIF_READ_WORKERS = 16  # Number of threads reading EXIF data in parallel
+EXIF_HEADER_BYTES = 65536  # Bytes read from the start of a JPG to find EXIF data
+
+# Files already renamed by this script (YYYYMMDD-HHMMSS-hex.jpg)
+_RENAMED_PATTERN = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{4}\.(jpg|jpeg)$", re.IGNORECASE)
+
+# EXIF tag ids
+DATETIME_TAG = 0x0132
+DATETIME_ORIGINAL_TAG = 0x9003
+EXIF_IFD_POINTER_TAG = 0x8769
+
+
+def _parse_datetime_candidates(values):
+    """
+    Parse the first valid EXIF datetime from candidate values, in order.
+
+    Cameras whose clock was never set write blank values like "    :  :     ",
+    so a value that fails to parse falls through to the next candidate.
+
+    Args:
+        values: EXIF datetime strings, most preferred first
+
+    Returns:
+        datetime object or None if there are no values
+
+    Raises:
+        ValueError: if there are values but none of them can be parsed
+    """
+    error = None
+    for value in values:
+        try:
+            # EXIF datetime format: "2024:01:23 14:30:00"
+            return datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
+        except ValueError as e:
+            error = e
+
+    if error:
+        raise error
+    return None
+
+
+def _read_ifd(tiff, offset, byte_order):
+    """
+    Read the entries of a TIFF image file directory (IFD).
+
+    Args:
+        tiff: TIFF structure bytes from the EXIF segment
+        offset: Offset of the IFD within the TIFF structure
+        byte_order: struct byte order character ("<" or ">")
+
+    Returns:
+        dict of tag id to (count, value field), where the 4 byte value field
+        holds either the value itself or the offset of the value
+    """
+    (count,) = struct.unpack_from(byte_order + "H", tiff, offset)
+    entries = {}
+    for i in range(count):
+        tag, _, value_count, value_field = struct.unpack_from(
+            byte_order + "HHI4s", tiff, offset + 2 + 12 * i
+        )
+        entries[tag] = (value_count, value_field)
+    return entries
+
+
+def _parse_tiff_datetime(tiff):
+    """
+    Find the datetime in the TIFF structure of an EXIF segment.
+
+    Args:
+        tiff: TIFF structure bytes from the EXIF segment
+
+    Returns:
+        datetime object or None if not found
+    """
+    byte_order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if byte_order is None:
+        return None
+
+    (ifd0_offset,) = struct.unpack_from(byte_order + "I", tiff, 4)
+    ifd0 = _read_ifd(tiff, ifd0_offset, byte_order)
+
+    exif_ifd = {}
+    if EXIF_IFD_POINTER_TAG in ifd0:
+        _, value_field = ifd0[EXIF_IFD_POINTER_TAG]
+        (exif_ifd_offset,) = struct.unpack(byte_order + "I", value_field)
+        exif_ifd = _read_ifd(tiff, exif_ifd_offset, byte_order)
+
+    # Look for DateTimeOriginal (when photo was taken)
+    # Fall back to DateTime if not found
+    values = []
+    for tag, ifd in ((DATETIME_ORIGINAL_TAG, exif_ifd), (DATETIME_TAG, ifd0)):
+        if tag not in ifd:
+            continue
+
+        value_count, value_field = ifd[tag]
+        if value_count <= 4:
+            value = value_field[:value_count]
+        else:
+            (value_offset,) = struct.unpack(byte_order + "I", value_field)
+            value = tiff[value_offset : value_offset + value_count]
+
+        values.append(value.rstrip(b"\x00 ").decode("ascii"))
+
+    return _parse_datetime_candidates(values)
+
+
+def _parse_exif_datetime(data):
+    """
+    Find the EXIF datetime in the start of a JPG without decoding the image.
+
+    Args:
+        data: Bytes from the start of the JPG file
+
+    Returns:
+        datetime object or None if not found
+    """
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    # Walk the JPG segments up to the start of the image data, looking for the
+    # APP1 segment holding the EXIF data
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker == 0xDA:
+            return None
+
+        (length,) = struct.unpack_from(">H", data, pos + 2)
+        if marker == 0xE1 and data[pos + 4 : pos + 10] == b"Exif\x00\x00":
+            return _parse_tiff_datetime(data[pos + 10 : pos + 2 + length])
+        pos += 2 + length
+
+    return None
 
 
 def get_exif_datetime(image_path):
     """
     Extract the datetime from EXIF data.
 
+    Only the EXIF segment at the start of the file is parsed. Pillow is used as
+    a fallback when the datetime can't be found that way.
+
     Args:
         image_path: Path to the image file
 
     Returns:
-        datetime object or None if not found
+        (datetime, warning) tuple. datetime is None if not found, warning is a
+        message to print with the image's status if EXIF data could not be read
     """
+    try:
+        with open(image_path, "rb") as f:
+            dt = _parse_exif_datetime(f.read(EXIF_HEADER_BYTES))
+
+        if dt:
+            return dt, None
+
+    except (OSError, struct.error, ValueError):
+        # Fall back to Pillow, which also reports the error if it persists
+        pass
+
     try:
         with Image.open(image_path) as img:
             exif_data = img._getexif()
 
             if not exif_data:
-                return None
+                return None, None
+
+            tags = {
+                TAGS.get(tag_id, tag_id): value for tag_id, value in exif_data.items()
+            }
 
             # Look for DateTimeOriginal (when photo was taken)
             # Fall back to DateTime if not found
-            for tag_id, value in exif_data.items():
-                tag_name = TAGS.get(tag_id, tag_id)
-
-                if tag_name == "DateTimeOriginal" or tag_name == "DateTime":
-                    # EXIF datetime format: "2024:01:23 14:30:00"
-                    dt = datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
-                    return dt
-
-            return None
+            names = ("DateTimeOriginal", "DateTime")
+            values = [tags[name] for name in names if tags.get(name)]
+            return _parse_datetime_candidates(values), None
 
     except Exception as e:
-        print(f"  Warning: Could not read EXIF from {image_path.name}: {e}")
-        return None
+        # Returned rather than printed, as this runs in a worker thread
+        return None, f"  Warning: Could not read EXIF from {image_path.name}: {e}"
 
 
 def generate_random_hex(length=4):
@@ -66,21 +216,21 @@ def generate_random_hex(length=4):
     return secrets.token_hex(length // 2)
 
 
-def rename_image(image_path):
+def rename_image(image_path, dt, warning=None):
     """
     Rename an image file based on its EXIF timestamp.
 
     Args:
         image_path: Path to the image file
+        dt: EXIF datetime of the image, or None if not found
+        warning: Warning from reading the EXIF data, printed with the status
 
     Returns:
         True if renamed, False if skipped
     """
-    # Get EXIF datetime
-    dt = get_exif_datetime(image_path)
-
     if not dt:
-        print(f"✗ Skipped: {image_path.name} (no EXIF datetime found)")
+        skipped = f"✗ Skipped: {image_path.name} (no EXIF datetime found)\n"
+        print(f"{warning}\n{skipped}" if warning else skipped)
         return False
 
     # Convert to UTC datetime
@@ -110,28 +260,30 @@ def rename_image(image_path):
         image_path.rename(new_path)
         dt_str_est = dt.strftime("%Y-%m-%d %H:%M:%S EST")
         dt_str_utc = dt_utc.strftime("%Y-%m-%d %H:%M:%S UTC")
-        print(f"✓ Renamed: {image_path.name}")
-        print(f"       to: {new_name}")
-        print(f"          ({dt_str_est} → {dt_str_utc})")
+        print(
+            f"✓ Renamed: {image_path.name}\n"
+            f"       to: {new_name}\n"
+            f"          ({dt_str_est} → {dt_str_utc})\n"
+        )
         return True
     except Exception as e:
-        print(f"✗ Error renaming {image_path.name}: {e}")
+        print(f"✗ Error renaming {image_path.name}: {e}\n")
         return False
 
 
 def main():
     """Main function to process all images."""
 
-    # Find all JPG files (case-insensitive)
-    image_files = []
-    for ext in ["*.jpg", "*.jpeg", "*.JPG", "*.JPEG"]:
-        image_files.extend(SOURCE_DIR.glob(ext))
+    # Find all JPG files (case-insensitive) in a single directory pass
+    with os.scandir(SOURCE_DIR) as entries:
+        image_files = [
+            Path(entry.path)
+            for entry in entries
+            if entry.is_file() and entry.name.lower().endswith((".jpg", ".jpeg"))
+        ]
 
     # Filter out files that already match the pattern (YYYYMMDD-HHMMSS-hex.jpg)
-    import re
-
-    pattern = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{4}\.(jpg|jpeg)$", re.IGNORECASE)
-    files_to_process = [f for f in image_files if not pattern.match(f.name)]
+    files_to_process = [f for f in image_files if not _RENAMED_PATTERN.match(f.name)]
 
     if not files_to_process:
         print(
@@ -141,11 +293,17 @@ def main():
 
     print(f"Found {len(files_to_process)} image(s) to rename\n")
 
+    image_paths = sorted(files_to_process)
+
+    # Read EXIF datetimes in parallel, this is I/O bound so threads suffice.
+    # Renaming stays sequential so the collision check can't race
+    with ThreadPoolExecutor(max_workers=EXIF_READ_WORKERS) as executor:
+        results = list(executor.map(get_exif_datetime, image_paths))
+
     renamed_count = 0
-    for image_path in sorted(files_to_process):
-        if rename_image(image_path):
+    for image_path, (dt, warning) in zip(image_paths, results):
+        if rename_image(image_path, dt, warning):
             renamed_count += 1
-        print()
 
     print(f"Done! Renamed {renamed_count} of {len(files_to_process)} image(s)")
 
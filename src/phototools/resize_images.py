@@ -1,5 +1,3 @@
-#!/usr/bin/env python3
-#
 # This CLI utility processes all JPG files in a directory and resizes them to
 # a maximum dimension with adjustable quality to reduce file size for web display.
 
@@ -8,67 +6,170 @@ from pathlib import Path
 
 from PIL import Image
 
+from phototools._core import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    EXIF_ORIENTATION_TAG,
+    check_backend,
+    find_images,
+    run_in_parallel,
+)
+
 # Default configuration
 DEFAULT_MAX_PIXELS = 3000  # Default max JPG dimension (longest edge) in pixels
 DEFAULT_QUALITY = 80  # Default JPG quality percentage
 DEFAULT_OUTPUT_DIR = "resized"
 
+# JPG luminance quantization table from the JPEG standard (ITU-T T.81, Annex K),
+# libjpeg scales it by the quality setting when encoding
+STANDARD_LUMINANCE_TABLE = (
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+)  # fmt: skip
+
+# JPG markers kept when copying without recompressing: APP0 (JFIF), APP2 (ICC
+# color profile) and APP14 (Adobe color transform). Other APPn segments (EXIF,
+# XMP, IPTC) and comments are dropped
+KEPT_APP_MARKERS = (0xE0, 0xE2, 0xEE)
+
+
+def _estimate_quality(img):
+    # Estimates the JPG quality of an opened JPG from its luminance quantization
+    # table by inverting libjpeg's quality scaling. Returns None if unknown
+    tables = getattr(img, "quantization", None)
+    if not tables or 0 not in tables:
+        return None
+
+    scale = sum(tables[0]) * 100 / sum(STANDARD_LUMINANCE_TABLE)
+    if scale <= 100:
+        return round((200 - scale) / 2)
+    return round(5000 / scale)
+
+
+def _is_already_compressed(source_path, max_pixels, quality):
+    # Checks if a JPG needs neither resizing, rotating nor recompressing at the
+    # output quality. Only the header is read, pixels are not decoded
+    with Image.open(source_path) as img:
+        if img.format != "JPEG" or max(img.size) > max_pixels:
+            return False
+
+        if img.getexif().get(EXIF_ORIENTATION_TAG, 1) != 1:
+            return False
+
+        source_quality = _estimate_quality(img)
+        return source_quality is not None and source_quality <= quality
+
+
+def _copy_without_metadata(source_path, output_path):
+    # Copies a JPG without re-encoding it, dropping the metadata segments
+    # before the image data
+    data = Path(source_path).read_bytes()
+
+    # The image data is copied up to the end of the file, so data appended
+    # after the end of image marker (e.g. by phone cameras) would be kept
+    if not data.endswith(b"\xff\xd9"):
+        raise ValueError("Data after end of image marker")
+
+    segments = [data[:2]]  # Start of image marker
+    pos = 2
+
+    while True:
+        if pos + 2 > len(data) or data[pos] != 0xFF:
+            raise ValueError("Invalid JPG marker")
+
+        # Any marker may be preceded by 0xFF fill bytes
+        while pos + 1 < len(data) and data[pos + 1] == 0xFF:
+            pos += 1
+
+        marker = data[pos + 1]
+        if marker == 0xDA:
+            # Start of scan, the rest of the file is image data
+            break
+
+        if pos + 4 > len(data):
+            raise ValueError("Truncated JPG segment")
+
+        end = pos + 2 + int.from_bytes(data[pos + 2 : pos + 4], "big")
+        if end > len(data):
+            raise ValueError("Truncated JPG segment")
+
+        is_metadata = 0xE0 <= marker <= 0xEF or marker == 0xFE
+        if not is_metadata or marker in KEPT_APP_MARKERS:
+            segments.append(data[pos:end])
+        pos = end
+
+    segments.append(data[pos:])
+    Path(output_path).write_bytes(b"".join(segments))
+
+
+def _copy_if_already_compressed(source_path, output_path, max_pixels, quality):
+    # Copies the JPG and returns a status message if recompressing it would
+    # only lose quality, otherwise returns None
+    if not _is_already_compressed(source_path, max_pixels, quality):
+        return None
+
+    try:
+        _copy_without_metadata(source_path, output_path)
+    except (IndexError, ValueError):
+        # Segments couldn't be walked or the file doesn't end at the end of
+        # image marker, re-encode the image instead
+        return None
+
+    return (
+        f"✓ Copied: {source_path.name}\n"
+        "  Already within max size and quality (no recompression needed)"
+    )
+
 
 def resize(
     source_path,  # Path to the source image
     output_path,  # Path to save the resized image
     max_pixels,  # Max output height or width in pixels
     quality,  # Output JPG quality percentage
+    force_recompress=False,  # Re-encode images that could be copied as is
+    backend=DEFAULT_BACKEND,  # Image library (pillow, vips)
 ):
+    # Returns a status message instead of printing it, so output from worker
+    # processes is printed in order by the main process
     try:
-        with Image.open(source_path) as img:
-            # Make a copy to avoid modifying original during context
-            img = img.copy()
-
-            # ImageOps.exif_transpose handles all EXIF orientation cases
-            from PIL import ImageOps
-
-            # Bakes image orientation into image by rotating to match EXIF orientation
-            img = ImageOps.exif_transpose(img)
-
-            if img is None:
-                print(f"✗ Error: Could not process orientation for {source_path.name}")
-                return
-
-            width, height = img.size
-            max_original = max(width, height)
-
-            if max_original <= max_pixels:
-                # Still re-save with quality reduction, removing EXIF data
-                img.save(output_path, quality=quality, optimize=True, exif=b"")
-                print(f"✓ Optimized quality: {source_path.name}")
-                print(f"  Size: {width}x{height} (no resize needed)")
-                return
-
-            # Calculate new dimension values maintaining aspect ratio
-            if width > height:
-                new_width = max_pixels
-                new_height = int((height / width) * max_pixels)
-            else:
-                new_height = max_pixels
-                new_width = int((width / height) * max_pixels)
-
-            # Resize image
-            img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-            # Save resized with reduced quality, removing EXIF data (orientation already applied)
-            img_resized.save(output_path, quality=quality, optimize=True, exif=b"")
-            print(f"✓ Resized: {source_path.name}")
-            print(f"  {width}x{height} → {new_width}x{new_height}")
+        if not force_recompress:
+            message = _copy_if_already_compressed(
+                source_path, output_path, max_pixels, quality
+            )
+            if message:
+                return message
+
+        # Images already within max_pixels are not resized, but still re-saved
+        # with quality reduction
+        (width, height), (new_width, new_height) = BACKENDS[backend](
+            source_path, output_path, max_pixels, max_pixels, quality, True
+        )
+
+        if max(width, height) <= max_pixels:
+            return (
+                f"✓ Optimized quality: {source_path.name}\n"
+                f"  Size: {width}x{height} (no resize needed)"
+            )
+
+        return (
+            f"✓ Resized: {source_path.name}\n"
+            f"  {width}x{height} → {new_width}x{new_height}"
+        )
 
     except Exception as e:
-        print(f"✗ Error processing {source_path.name}: {e}")
+        return f"✗ Error processing {source_path.name}: {e}"
 
 
 def main():
     parser = argparse.ArgumentParser(
         prog="resize_images",
-        description="Resizes JPG images and adjusts quality for size optimization. Resizing maintains the image's aspect ratio. The utility attempts to apply the source image's EXIF rotation to the output image. Images already smaller than the max dimension will not be increased or decreased in size, but will still be saved with the output JPG quality. If the images already exist in the destination folder with the same filename, the utility will overwrite them.",
+        description="Resizes JPG images and adjusts quality for size optimization. Resizing maintains the image's aspect ratio. The utility attempts to apply the source image's EXIF rotation to the output image. Images already smaller than the max dimension will not be increased or decreased in size, but will still be saved with the output JPG quality. Images that also need no rotation and are already compressed at or below the output quality are copied with their EXIF data removed instead of being recompressed, unless --force-recompress is given. If the images already exist in the destination folder with the same filename, the utility will overwrite them.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
 
@@ -100,6 +201,20 @@ def main():
         help="Output JPG quality percentage",
     )
 
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=tuple(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help="Image processing library, vips requires the optional pyvips dependency",
+    )
+
+    parser.add_argument(
+        "--force-recompress",
+        action="store_true",
+        help="Re-encode images already within the max size and quality instead of copying them",
+    )
+
     args = parser.parse_args()
 
     source_dir = Path(args.source_dir)
@@ -109,9 +224,12 @@ def main():
         print(f"Error: {source_dir} does not exist")
         return
 
-    image_files = []
-    for ext in ["*.jpg", "*.jpeg", "*.JPG", "*.JPEG"]:
-        image_files.extend(source_dir.glob(ext))
+    error = check_backend(args.backend)
+    if error:
+        print(f"Error: {error}")
+        return
+
+    image_files = find_images(source_dir)
 
     if not image_files:
         print(f"No JPG files found in {source_dir}")
@@ -121,20 +239,28 @@ def main():
     print("=== Process Parameters ===")
     print(f"Max height or width: {args.pixels}px")
     print(f"Quality: {args.quality}%")
+    print(f"Backend: {args.backend}")
     print("==========================")
     print(f"\nProcessing images from {source_dir} to {output_dir}...\n")
 
     # Create output directory if it doesn't exist
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Process each image
-    for source_path in sorted(image_files):
-        # Create output path
-        output_path = output_dir / source_path.name
-
-        # Resize and optimize
-        resize(source_path, output_path, args.pixels, args.quality)
-        print()
+    tasks = [
+        (
+            resize,
+            source_path,
+            output_dir / source_path.name,
+            args.pixels,
+            args.quality,
+            args.force_recompress,
+            args.backend,
+        )
+        for source_path in sorted(image_files)
+    ]
+
+    # Process images in parallel, one task per image
+    run_in_parallel(tasks)
 
     print(f"Done! Processed {len(image_files)} image(s)")
     print(f"Resized images saved to: {output_dir}")